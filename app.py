@@ -1,9 +1,14 @@
 """
 Streamlit app with ML integration
 """
+import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 from mood_classifier import MoodClassifier
+from track_catalog import TrackCatalog
+from user_centroids import STORE_PATH as USER_CENTROIDS_PATH, load_user_centroids
+from search_index import INDEX_PATH, SearchIndex, similar_tracks
 import base64
 
 # Page config
@@ -13,13 +18,70 @@ st.set_page_config(
     layout="wide"
 )
 
+# Attach to the shared feature store when a loader process has published one
+@st.cache_resource
+def load_store():
+    name = os.environ.get('MOOD_MUSIC_STORE')
+    if not name:
+        return None
+    try:
+        from shared_store import SharedStore
+        return SharedStore.attach(name)
+    except Exception as e:
+        print(f"⚠️ Shared store '{name}' unavailable, reading CSV instead: {e}")
+        return None
+
+store = load_store()
+
 # Initialize classifier
 @st.cache_resource
 def load_classifier():
-    return MoodClassifier()
+    return MoodClassifier(store=store)
 
 classifier = load_classifier()
 
+# Per-user centroid offsets learned from feedback (reloaded when the file changes)
+@st.cache_resource(max_entries=1)
+def load_personalization(store_mtime):
+    return load_user_centroids(USER_CENTROIDS_PATH)
+
+if os.path.exists(USER_CENTROIDS_PATH):
+    classifier.user_centroids = load_personalization(os.path.getmtime(USER_CENTROIDS_PATH))
+
+# Compact catalog: shared by all sessions of this worker instead of a DataFrame per rerun.
+# Keyed on the CSV's mtime so a retrain is picked up without restarting the app;
+# only the latest catalog is kept so retrains don't pile up old copies.
+@st.cache_resource(max_entries=1)
+def load_catalog(catalog_mtime):
+    # The shared catalog is only used while it matches the CSV (the loader may predate a retrain)
+    if store is not None and store.meta.get('source_mtime') == catalog_mtime:
+        return store.catalog
+    return TrackCatalog.load('dataset/spotify_with_moods.csv')
+
+# A listener's own mood for every catalog track, as codes into catalog.moods (-1 = unknown).
+# Cached so reruns (slider moves, keystrokes) don't re-score the whole catalog.
+@st.cache_resource(max_entries=16)
+def load_personal_moods(listener_id, centroids_mtime, catalog_mtime):
+    catalog = load_catalog(catalog_mtime)
+    moods, _, _ = classifier.predict_batch(catalog.energy, catalog.valence, user_id=listener_id,
+                                           track_drift=False)
+    codes = np.full(len(moods), -1, dtype=np.int8)
+    for i, mood in enumerate(catalog.moods):
+        codes[moods == mood] = i
+    return codes
+
+# Search index saved by train_model(); built on the fly if it wasn't built from this catalog
+@st.cache_resource(max_entries=1)
+def load_search_index(catalog_mtime):
+    catalog = load_catalog(catalog_mtime)
+    if os.path.exists(INDEX_PATH):
+        index = SearchIndex.load(INDEX_PATH)
+        if getattr(index, 'source_mtime', None) == catalog_mtime and len(index) == len(catalog):
+            return index
+    names = [catalog.track_name(i) for i in range(len(catalog))]
+    artists = [catalog.artist_name(i) for i in range(len(catalog))]
+    return SearchIndex.build(names, artists)
+
 # Title
 st.title("🎵 AI-Powered Music Playlist Generator")
 st.markdown("""
@@ -38,9 +100,30 @@ with st.sidebar:
         index=0
     )
     
+    # Start from a song instead of a mood
+    seed_row = None
+    seed_query = st.text_input("🔎 Start from a song or artist:", "").strip()
+    if seed_query:
+        try:
+            catalog_mtime = os.path.getmtime('dataset/spotify_with_moods.csv')
+            seed_catalog = load_catalog(catalog_mtime)
+            hits = load_search_index(catalog_mtime).search(seed_query, limit=8)
+        except Exception as e:
+            hits = []
+            st.caption(f"Search unavailable: {e}")
+        if len(hits):
+            seed_row = int(st.selectbox(
+                "Matches:", list(hits),
+                format_func=lambda r: f"{seed_catalog.track_name(r)} — {seed_catalog.artist_name(r)}"))
+        else:
+            st.caption("No matching songs")
+    
     # Number of songs
     num_songs = st.slider("Number of songs:", 5, 20, 10)
     
+    # Optional listener id for personalized moods
+    listener_id = st.text_input("Listener ID (optional):", "").strip()
+    
     st.divider()
     
     # AI Logic explanation
@@ -55,11 +138,17 @@ with st.sidebar:
     *   **Calm**: Low Energy + High Positivity (Chill)
     """)
     st.caption("Powered by K-Means Clustering")
+    
+    # Drift of this worker's recent predictions vs the training data
+    drift = classifier.drift_report()
+    if drift is not None:
+        detail = f"{drift['samples']:,} recent predictions"
+        if drift['status'] != 'insufficient data':
+            detail = f"PSI {drift['score']}, {detail}"
+        st.caption(f"📈 Feature drift: {drift['status']} ({detail})")
 
 # Main Content - Playlist Generation
 try:
-    df = pd.read_csv('dataset/spotify_with_moods.csv')
-    
     # Filter by mood
     mood_map = {
         "😊 Happy": "Happy",
@@ -68,23 +157,44 @@ try:
         "😢 Sad": "Sad"
     }
     
-    if selected_mood == "🎲 Surprise Me":
-        playlist_df = df.sample(n=min(num_songs, len(df)))
+    catalog_mtime = os.path.getmtime('dataset/spotify_with_moods.csv')
+    catalog = load_catalog(catalog_mtime)
+
+    # Re-label the catalog with this listener's own mood centroids
+    personal_moods = None
+    if classifier.user_centroids is not None and listener_id in classifier.user_centroids:
+        personal_moods = load_personal_moods(listener_id, os.path.getmtime(USER_CENTROIDS_PATH), catalog_mtime)
+
+    # Pick row indices; only the playlist rows are decoded for display
+    playlist_title = f"Your {selected_mood} Playlist"
+    if seed_row is not None:
+        # Seeded playlist: the song itself, then its nearest neighbours within its mood
+        same_mood = None
+        if personal_moods is not None:
+            same_mood = np.flatnonzero(personal_moods == personal_moods[seed_row])
+        picks = similar_tracks(catalog, seed_row, num_songs, same_mood)
+        playlist_title = f"Songs like {catalog.track_name(seed_row)}"
     else:
-        target_mood = mood_map[selected_mood]
-        filtered_df = df[df['mood'] == target_mood]
-        
-        if filtered_df.empty:
-            st.warning(f"No songs found for mood: {target_mood}")
-            playlist_df = pd.DataFrame()
+        if selected_mood == "🎲 Surprise Me":
+            candidates = np.arange(len(catalog))
+        elif personal_moods is not None:
+            candidates = np.flatnonzero(personal_moods == catalog.moods.index(mood_map[selected_mood]))
         else:
-            # Safe sampling
-            n_samples = min(num_songs, len(filtered_df))
-            playlist_df = filtered_df.sample(n=n_samples)
+            candidates = catalog.mood_rows(mood_map[selected_mood])
+        picks = np.random.choice(candidates, size=min(num_songs, len(candidates)), replace=False)
+
+    if len(picks) == 0:
+        st.warning(f"No songs found for mood: {mood_map.get(selected_mood, selected_mood)}")
+        playlist_df = pd.DataFrame()
+    else:
+        playlist_df = catalog.to_frame(picks)
+        if personal_moods is not None:
+            # Code -1 picks the trailing 'Unknown'
+            playlist_df['mood'] = np.array(catalog.moods + ['Unknown'], dtype=object)[personal_moods[picks]]
     
     # Display playlist
     if not playlist_df.empty:
-        st.subheader(f"Your {selected_mood} Playlist")
+        st.subheader(playlist_title)
         
         for i, (_, song) in enumerate(playlist_df.iterrows(), 1):
             col1, col2, col3 = st.columns([1, 4, 2])
@@ -0,0 +1,180 @@
+"""
+drift_monitor.py - Feature Drift Monitor
+Constant-memory sketches of what the classifier scores: fixed-bin histograms of
+energy and valence, per-cluster assignment counts and distance-to-centroid sums.
+train_model() saves a baseline sketch of the training data; MoodClassifier keeps a
+live sketch updated on every prediction and can report a drift score against it.
+The live sketch covers only recent predictions (see WINDOW_SIZE), so a shift shows
+up in the score instead of being diluted by everything scored since startup.
+
+Scores are Population Stability Index (PSI) values:
+    < 0.10 stable, 0.10-0.25 moderate shift, > 0.25 significant shift (retrain)
+"""
+import math
+import threading
+import joblib
+import numpy as np
+
+BASELINE_PATH = 'model/drift_baseline.pkl'
+FEATURES = ['energy', 'valence']
+
+# 10 bins over [0, 1] plus one underflow and one overflow bin; coarse enough
+# that a small training set still gives a stable baseline
+NUM_BINS = 10
+MODERATE_PSI = 0.10
+SIGNIFICANT_PSI = 0.25
+MIN_SAMPLES = 500
+# The live sketch is rotated every WINDOW_SIZE predictions and scored over the
+# current and previous sketch, i.e. the last WINDOW_SIZE to 2 * WINDOW_SIZE predictions
+WINDOW_SIZE = 50_000
+
+
+class FeatureSketch:
+    """Fixed-size summary of (energy, valence, cluster, distance) observations"""
+
+    def __init__(self, num_clusters):
+        self.count = 0
+        self.hist = np.zeros((len(FEATURES), NUM_BINS + 2), dtype=np.int64)
+        self.cluster_counts = np.zeros(num_clusters, dtype=np.int64)
+        self.distance_sums = np.zeros(num_clusters, dtype=np.float64)
+
+    @staticmethod
+    def _bin(x):
+        if x != x:  # NaN goes to the underflow bin
+            return 0
+        # Clamp first so infinities land in the end bins; floor matches update_batch()
+        return min(max(math.floor(min(max(x, -1.0), 2.0) * NUM_BINS) + 1, 0), NUM_BINS + 1)
+
+    def update(self, energy, valence, cluster, distance):
+        """Add one observation (O(1), no allocation)"""
+        self.count += 1
+        self.hist[0, self._bin(energy)] += 1
+        self.hist[1, self._bin(valence)] += 1
+        if 0 <= cluster < len(self.cluster_counts):
+            self.cluster_counts[cluster] += 1
+            self.distance_sums[cluster] += distance
+
+    def update_batch(self, energy, valence, clusters, distances):
+        """Add many observations at once"""
+        self.count += len(clusters)
+        for i, values in enumerate((energy, valence)):
+            values = np.clip(np.nan_to_num(np.asarray(values, dtype=np.float64), nan=-1.0), -1.0, 2.0)
+            bins = np.clip(np.floor(values * NUM_BINS).astype(np.int64) + 1, 0, NUM_BINS + 1)
+            self.hist[i] += np.bincount(bins, minlength=NUM_BINS + 2)
+        clusters = np.asarray(clusters)
+        ok = (clusters >= 0) & (clusters < len(self.cluster_counts))
+        k = len(self.cluster_counts)
+        self.cluster_counts += np.bincount(clusters[ok], minlength=k)
+        self.distance_sums += np.bincount(clusters[ok], weights=np.asarray(distances)[ok], minlength=k)
+
+    def merge(self, other):
+        """A new sketch holding the observations of both"""
+        merged = FeatureSketch(len(self.cluster_counts))
+        merged.count = self.count + other.count
+        merged.hist = self.hist + other.hist
+        merged.cluster_counts = self.cluster_counts + other.cluster_counts
+        merged.distance_sums = self.distance_sums + other.distance_sums
+        return merged
+
+    def mean_distances(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.distance_sums / self.cluster_counts
+
+    @classmethod
+    def from_training(cls, energy, valence, clusters, distances):
+        sketch = cls(int(np.max(clusters)) + 1)
+        sketch.update_batch(energy, valence, clusters, distances)
+        return sketch
+
+
+def _psi(expected, actual, prior=0.5):
+    """
+    Population Stability Index between two count vectors.
+    Counts are smoothed with a small prior so empty bins (common with a small
+    training set) don't dominate the score.
+    """
+    p = (expected + prior) / (expected.sum() + prior * len(expected))
+    q = (actual + prior) / (actual.sum() + prior * len(actual))
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+class DriftMonitor:
+    """
+    Live sketch of recently scored inputs, compared against a training baseline on demand.
+    Keeps two sketches and starts a new one every `window` predictions, dropping the oldest.
+    """
+
+    def __init__(self, baseline, window=WINDOW_SIZE):
+        self.baseline = baseline
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a fresh observation window (e.g. after a retrain)"""
+        with self._lock:
+            self.current = FeatureSketch(len(self.baseline.cluster_counts))
+            self.previous = FeatureSketch(len(self.baseline.cluster_counts))
+
+    def _rotate(self):
+        if self.current.count >= self.window:
+            self.previous = self.current
+            self.current = FeatureSketch(len(self.baseline.cluster_counts))
+
+    def update(self, energy, valence, cluster, distance):
+        with self._lock:
+            self.current.update(energy, valence, cluster, distance)
+            self._rotate()
+
+    def update_batch(self, energy, valence, clusters, distances):
+        with self._lock:
+            self.current.update_batch(energy, valence, clusters, distances)
+            self._rotate()
+
+    def score(self):
+        """
+        Drift of the recent predictions vs the baseline.
+        Returns: dict with per-signal PSI values, distance shift, overall score and status
+        """
+        with self._lock:
+            recent = self.previous.merge(self.current)  # a copy, so scoring happens outside the lock
+        hist, cluster_counts, n = recent.hist, recent.cluster_counts, recent.count
+        mean_dist = recent.mean_distances()
+
+        report = {'samples': n}
+        for i, feature in enumerate(FEATURES):
+            report[f'{feature}_psi'] = round(_psi(self.baseline.hist[i], hist[i]), 4)
+        report['cluster_psi'] = round(_psi(self.baseline.cluster_counts, cluster_counts), 4)
+
+        # Relative change in how far inputs sit from their centroid, weighted by traffic
+        base_dist = self.baseline.mean_distances()
+        seen = cluster_counts > 0
+        if seen.any():
+            shift = np.abs(mean_dist[seen] - base_dist[seen]) / np.maximum(base_dist[seen], 1e-9)
+            report['distance_shift'] = round(float(np.average(shift, weights=cluster_counts[seen])), 4)
+        else:
+            report['distance_shift'] = 0.0
+
+        overall = max(report[f'{f}_psi'] for f in FEATURES + ['cluster'])
+        report['score'] = overall
+        if n < MIN_SAMPLES:
+            report['status'] = 'insufficient data'
+        elif overall > SIGNIFICANT_PSI:
+            report['status'] = 'significant drift - retrain recommended'
+        elif overall > MODERATE_PSI:
+            report['status'] = 'moderate drift'
+        else:
+            report['status'] = 'stable'
+        return report
+
+
+def save_baseline(sketch, path=BASELINE_PATH):
+    joblib.dump(sketch, path)
+
+
+def load_monitor(path=BASELINE_PATH):
+    """A DriftMonitor over the saved baseline, or None if training hasn't saved one"""
+    try:
+        return DriftMonitor(joblib.load(path))
+    except Exception:
+        return None
@@ -0,0 +1,166 @@
+"""
+ingest.py - Bulk Catalog Ingestion
+Parses many raw CSV shards in parallel, validates and coerces the training schema,
+deduplicates tracks across shards by a hashed (track, artist) key, and writes a
+single clean training input.
+
+Usage:
+    python ingest.py drops/*.csv -o dataset/spotify.csv
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    # Optional: multithreaded CSV reader/writer that releases the GIL
+    import pyarrow
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pyarrow = None
+
+SCHEMA = ['track_name', 'artist_name', 'energy', 'valence', 'tempo']
+STRING_COLUMNS = ['track_name', 'artist_name']
+NUMERIC_COLUMNS = ['energy', 'valence', 'tempo']
+
+# Valid ranges (inclusive); rows outside are dropped rather than clipped.
+# Tempo 0 is how catalog exports mark an undetected tempo; training doesn't use tempo, so keep those rows.
+RANGES = {'energy': (0.0, 1.0), 'valence': (0.0, 1.0), 'tempo': (0.0, 300.0)}
+
+
+def read_shard(path):
+    """Read one shard with just the schema columns"""
+    engine = 'pyarrow' if pyarrow is not None else 'c'
+    # Names stay text even when a shard's titles all look numeric ("1999", not 1999.0)
+    df = pd.read_csv(path, engine=engine, dtype={col: str for col in STRING_COLUMNS})
+    df.columns = [str(c).strip() for c in df.columns]
+    missing = [c for c in SCHEMA if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+    return df.reindex(columns=SCHEMA)
+
+
+def clean_shard(df):
+    """
+    Coerce types and drop invalid rows.
+    Returns: cleaned DataFrame, dict of dropped row counts by reason
+    """
+    dropped = {}
+    for col in STRING_COLUMNS:
+        df[col] = df[col].astype('string').str.strip()
+
+    missing_name = df['track_name'].isna() | (df['track_name'] == '')
+    df.loc[df['artist_name'].isna() | (df['artist_name'] == ''), 'artist_name'] = 'Unknown'
+
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    bad_number = df[NUMERIC_COLUMNS].isna().any(axis=1)
+
+    out_of_range = pd.Series(False, index=df.index)
+    for col, (lo, hi) in RANGES.items():
+        out_of_range |= ~df[col].between(lo, hi)
+
+    dropped['missing_track_name'] = int(missing_name.sum())
+    dropped['non_numeric'] = int((bad_number & ~missing_name).sum())
+    dropped['out_of_range'] = int((out_of_range & ~bad_number & ~missing_name).sum())
+    return df[~(missing_name | bad_number | out_of_range)], dropped
+
+
+def dedup_keys(df):
+    """
+    64-bit hash of the normalized (track, artist) pair.
+    Names are lowercased with whitespace collapsed and joined with a unit separator,
+    then hashed without categorizing (much faster on mostly-unique keys).
+    """
+    string_dtype = 'string[pyarrow]' if pyarrow is not None else 'string'
+    normalized = [
+        df[col].astype(string_dtype).str.lower().str.replace(r'\s+', ' ', regex=True)
+        for col in STRING_COLUMNS
+    ]
+    joined = (normalized[0] + '\x1f' + normalized[1]).to_numpy(object)
+    return pd.util.hash_array(joined, categorize=False)
+
+
+def _process_shard(path):
+    df, dropped = clean_shard(read_shard(path))
+    return path, df, dedup_keys(df), dropped
+
+
+def write_csv(df, output_path):
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp = f"{output_path}.tmp"
+    if pyarrow is not None:
+        pa_csv.write_csv(pyarrow.Table.from_pandas(df, preserve_index=False), tmp)
+    else:
+        df.to_csv(tmp, index=False)
+    # Swap in atomically so a failed run never leaves a truncated training input
+    os.replace(tmp, output_path)
+
+
+def ingest(paths, output_path='dataset/spotify.csv', workers=None):
+    """
+    Ingest shards into one deduplicated training CSV.
+    Earlier shards win when the same (track, artist) appears in several.
+    Returns a stats dict.
+    """
+    paths = sorted(paths)
+    if not paths:
+        raise ValueError("no input shards")
+
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    stats = {'shards': len(paths), 'rows_read': 0, 'dropped': {}}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # map() keeps shard order, which makes "first occurrence wins" deterministic
+        results = list(pool.map(_process_shard, paths))
+
+    frames, keys = [], []
+    for path, df, shard_keys, dropped in results:
+        stats['rows_read'] += len(df) + sum(dropped.values())
+        for reason, count in dropped.items():
+            stats['dropped'][reason] = stats['dropped'].get(reason, 0) + count
+        frames.append(df)
+        keys.append(shard_keys)
+
+    combined = pd.concat(frames, ignore_index=True)
+    all_keys = np.concatenate(keys)
+    # Hash-table pass over the uint64 keys; keeps the first occurrence in shard order
+    clean = combined[~pd.Series(all_keys).duplicated(keep='first').to_numpy()]
+
+    stats['dropped']['duplicate'] = len(combined) - len(clean)
+    stats['rows_written'] = len(clean)
+    write_csv(clean, output_path)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge raw catalog CSV shards into one clean training input")
+    parser.add_argument('shards', nargs='+', help="shard CSV files or glob patterns")
+    parser.add_argument('-o', '--output', default='dataset/spotify.csv')
+    parser.add_argument('-j', '--workers', type=int, default=None, help="parallel shard parsers (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.shards for p in (glob.glob(pattern) or [pattern])})
+    print(f"📥 Ingesting {len(paths)} shard(s) ({'pyarrow' if pyarrow is not None else 'pandas C'} parser)...")
+
+    t0 = time.perf_counter()
+    try:
+        stats = ingest(paths, args.output, args.workers)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+
+    print(f"📊 Read {stats['rows_read']:,} rows, wrote {stats['rows_written']:,} to {args.output} in {elapsed:.2f}s")
+    for reason, count in stats['dropped'].items():
+        if count:
+            print(f"   ⚠️  Dropped {count:,} ({reason.replace('_', ' ')})")
+    print("✅ Ingestion complete. Run `python run.py --train` to retrain on the new catalog.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,29 @@ import joblib
 import pandas as pd
 import numpy as np
 import os
+from drift_monitor import load_monitor
 
 class MoodClassifier:
-    def __init__(self):
-        """Load trained ML model and artifacts"""
+    def __init__(self, store=None, user_centroids=None):
+        """
+        Load trained ML model and artifacts.
+        If a SharedStore is given, use its shared centroids/scaler instead of the pickles.
+        If a UserCentroidStore is given, predictions for known users use their personal centroids.
+        If training saved a drift baseline, every prediction also updates a drift monitor.
+        """
         self.model = None
         self.scaler = None
         self.cluster_mapping = None
+        self.user_centroids = user_centroids
+        self.drift_monitor = None
         
         try:
-            if os.path.exists('model/kmeans_model.pkl'):
+            if store is not None:
+                self.model = store.kmeans()
+                self.scaler = store.scaler()
+                self.cluster_mapping = store.cluster_mapping
+                print("✅ ML Model attached from shared store")
+            elif os.path.exists('model/kmeans_model.pkl'):
                 self.model = joblib.load('model/kmeans_model.pkl')
                 self.scaler = joblib.load('model/scaler.pkl')
                 
@@ -28,13 +41,15 @@ class MoodClassifier:
                 print("✅ ML Model loaded successfully")
             else:
                 print("⚠️ Model files not found. Please run train_model.py")
+            if self.model is not None:
+                self.drift_monitor = load_monitor()
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             self.model = None
 
-    def predict_mood(self, energy, valence):
+    def predict_mood(self, energy, valence, user_id=None):
         """
-        Predict mood using the ML model.
+        Predict mood using the ML model (personalized when user_id has learned centroids).
         Returns: mood (str), confidence (float), cluster (int)
         """
         if self.model is None:
@@ -46,27 +61,78 @@ class MoodClassifier:
             features = np.array([[energy, valence]])
             features_scaled = self.scaler.transform(features)
             
+            # Distance to every centroid (personal ones if this user has any)
+            distances = self._distances(features_scaled, user_id)
+
             # Predict cluster
-            cluster = int(self.model.predict(features_scaled)[0])
+            cluster = int(distances[0].argmin())
             
             # Get Mood
             mood = self.cluster_mapping.get(cluster, "Unknown")
             
             # Calculate Confidence based on distance to center
-            # transform returns distance to all centroids
-            distances = self.model.transform(features_scaled)
             dist_to_center = distances[0][cluster]
             
             # Heuristic for confidence: exp(-distance)
             # Closer to centroid = higher confidence
             confidence = np.exp(-dist_to_center) # This usually gives 0.5-1.0 range well
             
+            if self.drift_monitor is not None:
+                self.drift_monitor.update(energy, valence, cluster, dist_to_center)
+            
             return mood, confidence, cluster
             
         except Exception as e:
             print(f"Prediction Error: {e}")
             return self._fallback_rule_based(energy, valence)
 
+    def _distances(self, features_scaled, user_id=None):
+        """Distances from scaled features to each cluster center"""
+        centers = None
+        if user_id is not None and self.user_centroids is not None:
+            centers = self.user_centroids.personal_centers(
+                user_id, self.model.cluster_centers_, self.cluster_mapping)
+        if centers is None:
+            return self.model.transform(features_scaled)
+        return np.linalg.norm(features_scaled[:, None, :] - centers[None, :, :], axis=2)
+
+    def predict_batch(self, energy, valence, user_id=None, track_drift=True):
+        """
+        Vectorized predict_mood() for arrays of energy/valence values (all for one user_id, if given).
+        Pass track_drift=False when re-scoring the catalog rather than incoming tracks.
+        Returns: moods (ndarray of str), confidence (ndarray), clusters (ndarray)
+        """
+        energy = np.asarray(energy, dtype=np.float64)
+        valence = np.asarray(valence, dtype=np.float64)
+        if self.model is None:
+            return self._fallback_rule_based_batch(energy, valence)
+
+        features_scaled = self.scaler.transform(np.column_stack([energy, valence]))
+        distances = self._distances(features_scaled, user_id)
+        clusters = distances.argmin(axis=1)
+        dist_to_center = distances[np.arange(len(clusters)), clusters]
+        confidence = np.exp(-dist_to_center)
+        if track_drift and self.drift_monitor is not None:
+            self.drift_monitor.update_batch(energy, valence, clusters, dist_to_center)
+
+        mood_lookup = np.array([self.cluster_mapping.get(c, "Unknown") for c in range(distances.shape[1])],
+                               dtype=object)
+        return mood_lookup[clusters], confidence, clusters
+
+    def drift_report(self):
+        """Drift of the inputs predicted so far vs the training data (None without a baseline)"""
+        if self.drift_monitor is None:
+            return None
+        return self.drift_monitor.score()
+
+    def _fallback_rule_based_batch(self, energy, valence):
+        """Array version of _fallback_rule_based()"""
+        high_energy, high_valence = energy > 0.5, valence > 0.5
+        moods = np.select(
+            [high_energy & high_valence, high_energy & ~high_valence, ~high_energy & high_valence],
+            ["Happy", "Energetic", "Calm"], default="Sad").astype(object)
+        return moods, np.full(len(energy), 0.85), np.full(len(energy), -1)
+
     def _fallback_rule_based(self, energy, valence):
         """Simple fallback logic if ML model is missing"""
         confidence = 0.85 # Mock confidence
@@ -0,0 +1,157 @@
+"""
+profiler.py - Stage-Level Profiling for the Training Pipeline
+Records wall time, CPU time and memory per named stage and writes them
+as a JSON trace, optionally alongside a cProfile dump of the whole run.
+
+Memory per stage comes from the growth of the process's peak RSS, which costs
+nothing to read. trace_memory=True adds exact per-stage Python/numpy peaks via
+tracemalloc, but slows allocation-heavy stages several-fold, so its timings are
+flagged in the trace and shouldn't be compared with untraced runs.
+"""
+import cProfile
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+DEFAULT_TRACE_PATH = 'model/profile/train_trace.json'
+
+
+def _max_rss_bytes():
+    """Peak resident set size of this process so far (None where unsupported)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+class StageProfiler:
+    """
+    Usage:
+        profiler = StageProfiler('trace.json', cprofile_path='train.prof', trace_memory=False)
+        profiler.start()
+        with profiler.stage('kmeans_fit'):
+            ...
+        profiler.finish()
+
+    A disabled profiler (the default) makes stage() a no-op, so the pipeline
+    can always be written with stages and pay nothing unless profiling is asked for.
+    """
+
+    def __init__(self, trace_path=DEFAULT_TRACE_PATH, cprofile_path=None, enabled=True, trace_memory=False):
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.meta = {}
+        self._cprofile = None
+        self._wall_start = None
+        self._cpu_start = None
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.trace_memory:
+            # numpy/pandas report their buffers to tracemalloc, so this covers array memory too
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base_mem, _ = tracemalloc.get_traced_memory()
+        rss0 = _max_rss_bytes()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            peak_mem = None
+            if self.trace_memory:
+                peak_mem = max(tracemalloc.get_traced_memory()[1] - base_mem, 0)
+            rss = _max_rss_bytes()
+            self.stages.append({
+                'name': name,
+                'wall_s': round(wall, 6),
+                'cpu_s': round(cpu, 6),
+                'peak_mem_bytes': peak_mem,
+                'rss_growth_bytes': rss - rss0 if rss is not None else None,
+                'max_rss_bytes': rss,
+            })
+
+    def finish(self):
+        """Stop profiling and write the JSON trace (and cProfile dump). Returns the trace dict."""
+        if not self.enabled:
+            return None
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            os.makedirs(os.path.dirname(self.cprofile_path) or '.', exist_ok=True)
+            self._cprofile.dump_stats(self.cprofile_path)
+
+        peak_mem = None
+        if self.trace_memory:
+            _, peak_mem = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        # Instrumentation that inflates the recorded wall/CPU times
+        overhead = [name for name, on in (('tracemalloc', self.trace_memory),
+                                          ('cprofile', self._cprofile is not None)) if on]
+
+        trace = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'meta': self.meta,
+            'timings_include_overhead_from': overhead,
+            'total': {
+                'wall_s': round(time.perf_counter() - self._wall_start, 6),
+                'cpu_s': round(time.process_time() - self._cpu_start, 6),
+                'peak_mem_bytes': peak_mem,
+                'max_rss_bytes': _max_rss_bytes(),
+            },
+            'stages': self.stages,
+            'cprofile': self.cprofile_path,
+        }
+
+        if self.trace_path:
+            os.makedirs(os.path.dirname(self.trace_path) or '.', exist_ok=True)
+            with open(self.trace_path, 'w') as f:
+                json.dump(trace, f, indent=2)
+        return trace
+
+    def print_summary(self):
+        if not self.enabled or not self.stages:
+            return
+        mem_key, mem_label = (('peak_mem_bytes', 'Peak Mem (MB)') if self.trace_memory
+                              else ('rss_growth_bytes', 'RSS Growth (MB)'))
+        print(f"\n⏱️  {'Stage':<16} {'Wall (s)':>10} {'CPU (s)':>10} {mem_label:>16}")
+        print("-" * 56)
+        for s in self.stages:
+            mem = f"{s[mem_key] / 2**20:.2f}" if s[mem_key] is not None else "n/a"
+            print(f"   {s['name']:<16} {s['wall_s']:>10.3f} {s['cpu_s']:>10.3f} {mem:>16}")
+        if self.trace_memory or self.cprofile_path:
+            print("⚠️  Timings include tracemalloc/cProfile overhead")
+        if self.trace_path:
+            print(f"📄 Trace written to {self.trace_path}")
+        if self.cprofile_path:
+            print(f"📄 cProfile dump written to {self.cprofile_path}")
@@ -4,6 +4,7 @@ One script to rule them all: trains model, runs web app, or shows analysis
 """
 import sys
 import os
+import argparse
 import subprocess
 from mood_classifier import MoodClassifier
 
@@ -69,7 +70,7 @@ def run_web_app():
         print(f"❌ Error starting web app: {e}")
 
 def train_ml_model():
-    """Train the K-Means ML model"""
+    """Train the K-Means ML model (profiled when --profile/--cprofile is given). Returns True on success."""
     print("\n" + "="*60)
     print("🤖 TRAINING ML MODEL")
     print("="*60)
@@ -77,11 +78,40 @@ def train_ml_model():
     try:
         # Import dynamically to avoid top-level errors if dependencies are missing during check
         from train_model import train_model
-        train_model()
+        return bool(train_model(profiler=make_profiler(), use_cache=not ARGS.no_cache))
     except ImportError:
         print("❌ Could not import train_model. Make sure dependencies are installed.")
     except Exception as e:
         print(f"❌ Error during training: {e}")
+    return False
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mood Music AI launcher")
+    parser.add_argument('--train', action='store_true',
+                        help="retrain the model and exit instead of showing the menu")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always refit, even if the dataset and config match a cached model")
+    parser.add_argument('--profile', nargs='?', const='model/profile/train_trace.json', default=None,
+                        metavar='TRACE_JSON',
+                        help="record wall/CPU time and memory growth per training stage "
+                             "(default trace: model/profile/train_trace.json)")
+    parser.add_argument('--cprofile', default=None, metavar='PROF_FILE',
+                        help="also dump a cProfile of the training run (implies --profile)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="record exact per-stage peak memory with tracemalloc (implies --profile; "
+                             "slows Python-heavy stages, so timings are not comparable)")
+    return parser.parse_args(argv)
+
+# Command-line training options, applied to every training run in this session
+ARGS = argparse.Namespace(train=False, no_cache=False, profile=None, cprofile=None, trace_memory=False)
+
+def make_profiler():
+    """Build a StageProfiler from the --profile/--cprofile/--trace-memory options, or None"""
+    if not (ARGS.profile or ARGS.cprofile or ARGS.trace_memory):
+        return None
+    from profiler import StageProfiler, DEFAULT_TRACE_PATH
+    return StageProfiler(trace_path=ARGS.profile or DEFAULT_TRACE_PATH, cprofile_path=ARGS.cprofile,
+                         trace_memory=ARGS.trace_memory)
 
 def show_menu():
     """Display interactive menu"""
@@ -114,10 +144,17 @@ def show_menu():
         show_menu()
 
 def main():
+    global ARGS
+    ARGS = parse_args()
+    
     show_banner()
     if not check_dependencies():
         sys.exit(1)
     
+    if ARGS.train:
+        # Non-zero exit so scripted/CI retrains notice a failed run
+        sys.exit(0 if train_ml_model() else 1)
+    
     # Check if model exists, if not, offer to train
     if not os.path.exists('model/kmeans_model.pkl'):
         print("\n⚠️ AI Model not found!")
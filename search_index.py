@@ -0,0 +1,190 @@
+"""
+search_index.py - Track & Artist Search Index
+A prefix/token index over track and artist names for type-ahead search.
+Built by train_model() next to the labeled catalog; row ids match the rows of
+dataset/spotify_with_moods.csv (and therefore TrackCatalog).
+
+Layout: a sorted token vocabulary plus CSR postings (row ids per token), so a
+prefix is one binary search for its token id range and a slice of postings.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+import joblib
+import numpy as np
+import pandas as pd
+
+INDEX_PATH = 'model/search_index.pkl'
+
+# Runs of letters and digits in any script (\w minus the underscore)
+_TOKEN = re.compile(r'[^\W_]+')
+# Latin-style accents (U+0300-U+036F); other scripts' marks such as kana voicing are kept
+_ACCENTS = re.compile('[\u0300-\u036f]')
+
+
+def tokenize(text):
+    """Casefolded, accent-folded alphanumeric tokens; non-Latin scripts are kept as they are"""
+    text = str(text)
+    if text.isascii():
+        return _TOKEN.findall(text.lower())
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return _TOKEN.findall(unicodedata.normalize('NFC', _ACCENTS.sub('', text)))
+
+
+def _gather_runs(values, starts, lengths):
+    """Concatenate values[s:s+n] for each (s, n)"""
+    shift = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return values[np.arange(lengths.sum()) + shift]
+
+
+def _csr_gather(offsets, values, rows):
+    """Concatenate values[offsets[r]:offsets[r+1]] for each r; also returns each piece's length"""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    return _gather_runs(values, starts, lengths), lengths
+
+
+class SearchIndex:
+    """
+    Inverted index (token -> rows) for finding candidates, plus a forward index
+    (row -> token ids) for checking the remaining query tokens against just those
+    candidates, so common words never cost a full postings scan.
+    """
+
+    def __init__(self, vocab, token_offsets, postings, row_offsets, row_tokens, source_mtime=None):
+        self.vocab = vocab                  # sorted list of tokens; token id = position
+        self.token_offsets = token_offsets  # rows of token i are postings[token_offsets[i]:token_offsets[i+1]]
+        self.postings = postings            # row ids, ascending within each token
+        self.row_offsets = row_offsets      # token ids of row r are row_tokens[row_offsets[r]:row_offsets[r+1]]
+        self.row_tokens = row_tokens
+        self.source_mtime = source_mtime    # mtime of the labeled CSV it was built from
+
+    def __len__(self):
+        return len(self.row_offsets) - 1
+
+    @classmethod
+    def build(cls, track_names, artist_names, source_mtime=None):
+        tokens, counts = [], []
+        for track, artist in zip(track_names, artist_names):
+            row_tokens = set(tokenize(track))
+            row_tokens.update(tokenize(artist))
+            tokens.extend(row_tokens)
+            counts.append(len(row_tokens))
+
+        # Number tokens in sorted order so a prefix is a contiguous id range
+        codes, uniques = pd.factorize(pd.Series(tokens, dtype=object), sort=True)
+        vocab = list(uniques)
+        row_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=row_offsets[1:])
+        row_tokens = codes.astype(np.int32)
+
+        rows = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        order = np.argsort(row_tokens, kind='stable')  # stable keeps rows ascending per token
+        token_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_tokens, minlength=len(vocab)), out=token_offsets[1:])
+        return cls(vocab, token_offsets, rows[order], row_offsets, row_tokens, source_mtime)
+
+    def _prefix_range(self, prefix):
+        """Token id range [lo, hi) of tokens starting with prefix"""
+        lo = bisect_left(self.vocab, prefix)
+        hi = bisect_left(self.vocab, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def _token_id(self, token):
+        i = bisect_left(self.vocab, token)
+        return i if i < len(self.vocab) and self.vocab[i] == token else -1
+
+    def search(self, query, limit=10):
+        """
+        Row ids matching every query token as a prefix (type-ahead semantics),
+        ranked by how many query tokens match a whole word, then by catalog order.
+        """
+        tokens = sorted(set(tokenize(query)))
+        if not tokens:
+            return np.empty(0, dtype=np.int32)
+
+        # Every match contains the most selective token, so its rows are the candidates
+        ranges = [self._prefix_range(t) for t in tokens]
+        exact_ids = [self._token_id(t) for t in tokens]
+        sizes = [self.token_offsets[hi] - self.token_offsets[lo] for lo, hi in ranges]
+        lo, hi = ranges[int(np.argmin(sizes))]
+
+        # Check candidates in catalog order. Once `limit` rows match as a whole word
+        # every query token that is a word at all (the best possible rank), later
+        # rows can't displace them.
+        max_exact = sum(token_id >= 0 for token_id in exact_ids)
+        found_rows, found_exact = [np.empty(0, dtype=self.postings.dtype)], [np.empty(0, dtype=np.int32)]
+        best = 0
+        for rows in self._candidates_in_order(lo, hi):
+            keep, exact = self._match(rows, ranges, exact_ids)
+            found_rows.append(rows[keep])
+            found_exact.append(exact[keep])
+            best += int((exact[keep] == max_exact).sum())
+            if best >= limit:
+                break
+
+        rows, exact = np.concatenate(found_rows), np.concatenate(found_exact)
+        return rows[np.lexsort((rows, -exact))][:limit]
+
+    def _candidates_in_order(self, lo, hi, first=4096):
+        """
+        Rows having any token in [lo, hi), ascending, in growing chunks.
+        Each round takes the first k postings of every token; rows up to the smallest
+        k-th posting among the truncated tokens are then complete, without merging
+        whole postings lists (a one-letter prefix can cover most of the catalog).
+        """
+        starts = self.token_offsets[lo:hi]
+        counts = self.token_offsets[lo + 1:hi + 1] - starts
+        done, k = -1, first
+        while True:
+            rows = _gather_runs(self.postings, starts, np.minimum(counts, k))
+            if hi - lo > 1:
+                rows = np.unique(rows)
+            truncated = counts > k
+            bound = self.postings[starts[truncated] + k - 1].min() if truncated.any() else None
+            chunk = rows[rows > done] if bound is None else rows[(rows > done) & (rows <= bound)]
+            if len(chunk):
+                yield chunk
+            if bound is None:
+                return
+            done, k = bound, k * 4
+
+    def _match(self, rows, ranges, exact_ids):
+        """Whether each row has every query token as a prefix, and how many it has as whole words"""
+        # Check each query token against the rows' own token ids (forward index)
+        ids, lengths = _csr_gather(self.row_offsets, self.row_tokens, rows)
+        piece_starts = np.r_[0, np.cumsum(lengths)[:-1]]
+        keep = np.ones(len(rows), dtype=bool)
+        exact = np.zeros(len(rows), dtype=np.int32)
+        for (t_lo, t_hi), token_id in zip(ranges, exact_ids):
+            hit = ((ids >= t_lo) & (ids < t_hi)).astype(np.int8)
+            keep &= np.add.reduceat(hit, piece_starts) > 0
+            exact += np.add.reduceat((ids == token_id).astype(np.int32), piece_starts)
+        return keep, exact
+
+    def save(self, path=INDEX_PATH):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=INDEX_PATH):
+        return joblib.load(path)
+
+
+def similar_tracks(catalog, seed_row, n, rows=None):
+    """
+    The n tracks closest to the seed in energy/valence, seed first.
+    rows restricts the candidates; defaults to the tracks sharing the seed's mood.
+    """
+    if rows is None:
+        code = catalog.mood_codes[seed_row]
+        rows = catalog.mood_rows(catalog.moods[code]) if code >= 0 else np.arange(len(catalog))
+    rows = np.asarray(rows)
+    rows = rows[rows != seed_row]
+    dist = np.hypot(catalog.energy[rows] - catalog.energy[seed_row],
+                    catalog.valence[rows] - catalog.valence[seed_row])
+    k = min(n - 1, len(rows))
+    if k <= 0:
+        return np.array([seed_row], dtype=np.int64)
+    nearest = np.argpartition(dist, k - 1)[:k]
+    nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+    return np.r_[seed_row, rows[nearest]].astype(np.int64)
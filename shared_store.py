@@ -0,0 +1,199 @@
+"""
+shared_store.py - Shared-Memory Feature Store
+Publishes the labeled catalog and the model arrays into one shared-memory segment,
+so several app worker processes can attach to them zero-copy instead of each
+parsing the CSV and unpickling the model on its own.
+
+Run `python shared_store.py` in a loader process, then start the workers with
+MOOD_MUSIC_STORE set to the segment name (default: mood_music_store).
+"""
+import json
+import os
+import sys
+import time
+import joblib
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from track_catalog import TrackCatalog
+
+SEGMENT_NAME = 'mood_music_store'
+CATALOG_PATH = 'dataset/spotify_with_moods.csv'
+MODEL_DIR = 'model'
+
+# Segment layout: [8-byte header length][JSON header][padding][arrays...]
+# Every array starts on a 64-byte boundary so numpy views are cache-line aligned.
+_ALIGN = 64
+_HEADER_LEN_BYTES = 8
+
+
+def build_store_arrays(catalog_path=CATALOG_PATH, model_dir=MODEL_DIR):
+    """
+    Load the compact catalog and model artifacts as flat numpy arrays.
+    Returns: arrays (dict of name -> ndarray), meta (dict, JSON-serializable)
+    """
+    source_mtime = os.path.getmtime(catalog_path)  # before reading, so a concurrent retrain looks stale
+    catalog = TrackCatalog.load(catalog_path)
+    kmeans = joblib.load(os.path.join(model_dir, 'kmeans_model.pkl'))
+    scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+    cluster_mapping = joblib.load(os.path.join(model_dir, 'cluster_mapping.pkl'))
+
+    arrays = dict(catalog.arrays)
+    arrays.update({
+        'centroids': np.ascontiguousarray(kmeans.cluster_centers_, dtype=np.float64),
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+    })
+    meta = {
+        'moods': catalog.moods,
+        'cluster_mapping': {str(c): m for c, m in cluster_mapping.items()},
+        'num_tracks': len(catalog),
+        # Lets workers tell whether the CSV was retrained after this store was published
+        'source_mtime': source_mtime,
+    }
+    return arrays, meta
+
+
+def publish(arrays, meta, name=SEGMENT_NAME):
+    """
+    Copy the arrays into a new shared-memory segment.
+    The caller owns the returned SharedMemory and must close() and unlink() it.
+    """
+    specs = {}
+    offset = 0
+    for key, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[key] = arr
+        specs[key] = {'dtype': arr.dtype.str, 'shape': list(arr.shape), 'offset': offset}
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({'meta': meta, 'arrays': specs}).encode('utf-8')
+    data_start = -(-(_HEADER_LEN_BYTES + len(header)) // _ALIGN) * _ALIGN
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(data_start + offset, 1))
+    shm.buf[:_HEADER_LEN_BYTES] = len(header).to_bytes(_HEADER_LEN_BYTES, 'little')
+    shm.buf[_HEADER_LEN_BYTES:_HEADER_LEN_BYTES + len(header)] = header
+
+    for key, arr in arrays.items():
+        start = data_start + specs[key]['offset']
+        shm.buf[start:start + arr.nbytes] = arr.reshape(-1).view(np.uint8)
+    return shm
+
+
+class _AttachedSegment(shared_memory.SharedMemory):
+    """
+    Worker-side handle. Numpy views handed out by SharedStore keep the buffer
+    exported, so the close() in SharedMemory.__del__ may raise at interpreter exit.
+    """
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+
+def _open_segment(name):
+    """Attach to an existing segment without letting this process unlink it on exit"""
+    if sys.version_info >= (3, 13):
+        return _AttachedSegment(name=name, create=False, track=False)
+
+    shm = _AttachedSegment(name=name, create=False)
+    # Before 3.13 the resource tracker of *every* attaching process would destroy
+    # the segment when that process exits; only the loader should do that.
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class SharedStore:
+    """Read-only, zero-copy view of a published feature store"""
+
+    def __init__(self, shm):
+        self._shm = shm
+        header_len = int.from_bytes(bytes(shm.buf[:_HEADER_LEN_BYTES]), 'little')
+        header = json.loads(bytes(shm.buf[_HEADER_LEN_BYTES:_HEADER_LEN_BYTES + header_len]))
+        data_start = -(-(_HEADER_LEN_BYTES + header_len) // _ALIGN) * _ALIGN
+
+        self.meta = header['meta']
+        self.moods = self.meta['moods']
+        self.cluster_mapping = {int(c): m for c, m in self.meta['cluster_mapping'].items()}
+
+        self.arrays = {}
+        for key, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            arr = np.frombuffer(shm.buf, dtype=dtype, count=count,
+                                offset=data_start + spec['offset']).reshape(spec['shape'])
+            arr.flags.writeable = False
+            self.arrays[key] = arr
+
+        self.catalog = TrackCatalog(self.arrays, self.moods)
+
+    @classmethod
+    def attach(cls, name=SEGMENT_NAME):
+        """Attach to a segment published by another process"""
+        return cls(_open_segment(name))
+
+    def __len__(self):
+        return self.meta['num_tracks']
+
+    def scaler(self):
+        return SharedScaler(self.arrays['scaler_mean'], self.arrays['scaler_scale'])
+
+    def kmeans(self):
+        return SharedKMeans(self.arrays['centroids'])
+
+    def close(self):
+        """Detach from the segment (numpy views must not be used afterwards)"""
+        self.arrays = {}
+        self.catalog = None
+        self._shm.close()
+
+
+class SharedScaler:
+    """StandardScaler.transform() backed by shared arrays"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class SharedKMeans:
+    """KMeans.predict()/transform() backed by shared centroids"""
+
+    def __init__(self, centroids):
+        self.cluster_centers_ = centroids
+
+    def transform(self, X):
+        diff = np.asarray(X, dtype=np.float64)[:, None, :] - self.cluster_centers_[None, :, :]
+        return np.sqrt((diff ** 2).sum(axis=2))
+
+    def predict(self, X):
+        return self.transform(X).argmin(axis=1)
+
+
+def main():
+    name = os.environ.get('MOOD_MUSIC_STORE', SEGMENT_NAME)
+    print("📦 Building shared feature store...")
+    arrays, meta = build_store_arrays()
+    shm = publish(arrays, meta, name)
+    print(f"✅ Published {meta['num_tracks']} tracks ({shm.size / 1024:.1f} KB) as '{name}'")
+    print(f"➡️ Start workers with MOOD_MUSIC_STORE={name}")
+    print("➡️ Press Ctrl+C to unpublish and exit")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\n👋 Unpublishing store")
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == "__main__":
+    main()
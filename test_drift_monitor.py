@@ -0,0 +1,54 @@
+"""
+test_drift_monitor.py - Test the feature drift sketches
+Uses a synthetic baseline; no trained model needed.
+"""
+import numpy as np
+from drift_monitor import DriftMonitor, FeatureSketch, NUM_BINS
+
+NUM_CLUSTERS = 4
+
+
+def _observations(n, rng, shift=0.0):
+    energy = np.clip(rng.normal(0.5 + shift, 0.15, n), 0, 1)
+    valence = np.clip(rng.normal(0.5, 0.15, n), 0, 1)
+    return energy, valence, rng.integers(0, NUM_CLUSTERS, n), rng.random(n)
+
+
+def test_single_and_batch_updates_bin_alike():
+    values = [-0.05, -1e-9, 0.0, 0.05, 0.1, 0.999, 1.0, 1.05, float('nan'), float('inf'), float('-inf')]
+    single, batch = FeatureSketch(NUM_CLUSTERS), FeatureSketch(NUM_CLUSTERS)
+    for x in values:
+        single.update(x, x, 0, 0.0)
+    batch.update_batch(values, values, np.zeros(len(values), dtype=int), np.zeros(len(values)))
+
+    np.testing.assert_array_equal(single.hist, batch.hist)
+    assert FeatureSketch._bin(-0.05) == 0
+    assert FeatureSketch._bin(float('inf')) == NUM_BINS + 1
+    assert FeatureSketch._bin(1.0) == NUM_BINS + 1
+
+
+def test_score_tracks_recent_predictions():
+    rng = np.random.default_rng(0)
+    monitor = DriftMonitor(FeatureSketch.from_training(*_observations(20_000, rng)), window=1000)
+
+    # A long stable history must not hide a later shift
+    for _ in range(50):
+        monitor.update_batch(*_observations(500, rng))
+    assert monitor.score()['status'] == 'stable'
+    for _ in range(4):
+        monitor.update_batch(*_observations(500, rng, shift=0.3))
+
+    report = monitor.score()
+    assert report['samples'] <= 2 * monitor.window
+    assert report['status'] == 'significant drift - retrain recommended', report
+
+
+def main():
+    print("🧪 Testing DriftMonitor")
+    for test in (test_single_and_batch_updates_bin_alike, test_score_tracks_recent_predictions):
+        test()
+        print(f"   ✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
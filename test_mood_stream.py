@@ -0,0 +1,102 @@
+"""
+test_mood_stream.py - Test the rolling per-user mood windows
+Feeds a small hand-written event log through RollingMoodAggregator and checks
+every emitted window. No trained model needed: events come with their moods.
+"""
+import numpy as np
+import pandas as pd
+from mood_stream import RollingMoodAggregator
+from track_catalog import MOODS
+
+# 30-second windows sliding every 10 seconds (3 buckets per window)
+WINDOW, HOP = 30, 10
+
+# (user, timestamp, mood, energy); each event is its own batch so arrival order matters
+EVENTS = [
+    ('a', 5, 'Happy', 0.1),       # bucket 0
+    ('a', 15, 'Sad', 0.2),        # bucket 1 -> closes a's window ending at 10
+    ('a', 8, 'Calm', 0.3),        # bucket 0 again: out of order but still inside the window
+    ('b', 20, 'Energetic', 0.4),  # bucket 2
+    ('a', 25, 'Happy', 0.5),      # bucket 2 -> closes a's window ending at 20
+    ('a', 45, 'Sad', 0.6),        # bucket 4 -> closes a's window ending at 30
+    ('a', 12, 'Energetic', 0.7),  # bucket 1: exactly a full window behind a's last event -> late, dropped
+    ('c', 65, 'Calm', 0.8),       # bucket 6 -> b (idle since bucket 2) expires
+    ('b', 80, 'Happy', 0.9),      # bucket 8 -> b comes back fresh; a (idle since bucket 4) expires
+]
+
+# (emitted after event #, user, window_start, window_end, Happy, Energetic, Sad, Calm, mean_energy);
+# event # len(EVENTS) is the final flush()
+EXPECTED = [
+    (1, 'a', -20, 10, 1, 0, 0, 0, 0.1),
+    (4, 'a', -10, 20, 1, 0, 1, 1, 0.2),        # includes the out-of-order Calm
+    (5, 'a', 0, 30, 2, 0, 1, 1, 0.275),
+    (7, 'b', 0, 30, 0, 1, 0, 0, 0.4),          # expiry
+    (8, 'a', 20, 50, 1, 0, 1, 0, 0.55),        # expiry; late event absent
+    (9, 'b', 60, 90, 1, 0, 0, 0, 0.9),         # flush: nothing carried over from b's first session
+    (9, 'c', 40, 70, 0, 0, 0, 1, 0.8),         # flush
+]
+
+
+def _batch(user, timestamp, mood, energy):
+    batch = {
+        'user': np.array([user], dtype=object),
+        'timestamp': np.array([float(timestamp)]),
+        'track': np.array([None], dtype=object),
+        'energy': np.array([energy]),
+        'valence': np.array([0.5]),
+    }
+    return batch, np.array([MOODS.index(mood)], dtype=np.int8)
+
+
+def run_events(aggregator):
+    """All emitted windows, with the index of the event whose update() emitted them"""
+    frames = [aggregator.update(*_batch(*event)) for event in EVENTS] + [aggregator.flush()]
+    return pd.concat([f.assign(step=i) for i, f in enumerate(frames) if f is not None], ignore_index=True)
+
+
+def test_rolling_windows():
+    aggregator = RollingMoodAggregator(WINDOW, HOP, capacity=3)
+    windows = run_events(aggregator)
+
+    got = sorted((r.step, r.user, r.window_start, r.window_end, r.Happy, r.Energetic, r.Sad, r.Calm,
+                  round(r.mean_energy, 4)) for r in windows.itertuples())
+    assert got == EXPECTED, got
+
+    assert (windows['events'] == windows[MOODS].sum(axis=1)).all()
+    assert aggregator.late_events == 1
+    assert aggregator.slots == {}
+    # b's expired slot is reused when b comes back, so the three preallocated slots suffice
+    assert len(aggregator.slot_users) == 3
+
+
+def test_batched_in_order_log_matches_single_events():
+    """An in-order log gives the same windows whether it arrives in one batch or event by event"""
+    in_order = [e for e in EVENTS if e[1] not in (8, 12)]
+    one_by_one = RollingMoodAggregator(WINDOW, HOP)
+    expected = []
+    for event in in_order:
+        frame = one_by_one.update(*_batch(*event))
+        if frame is not None:
+            expected.append(frame)
+    expected = pd.concat(expected + [one_by_one.flush()], ignore_index=True)
+
+    parts = [_batch(*event) for event in in_order]
+    batch = {key: np.concatenate([p[0][key] for p in parts]) for key in parts[0][0]}
+    codes = np.concatenate([p[1] for p in parts])
+    together = RollingMoodAggregator(WINDOW, HOP)
+    got = pd.concat([together.update(batch, codes), together.flush()], ignore_index=True)
+
+    key = ['user', 'window_end']
+    pd.testing.assert_frame_equal(got.sort_values(key, ignore_index=True),
+                                  expected.sort_values(key, ignore_index=True))
+
+
+def main():
+    print("🧪 Testing RollingMoodAggregator")
+    for test in (test_rolling_windows, test_batched_in_order_log_matches_single_events):
+        test()
+        print(f"   ✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
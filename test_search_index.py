@@ -0,0 +1,90 @@
+"""
+test_search_index.py - Test the track/artist search index
+Compares SearchIndex.search() with a brute-force scan over a synthetic catalog
+large enough that candidates are streamed in several rounds. No trained model needed.
+"""
+import numpy as np
+from search_index import SearchIndex, tokenize
+
+WORDS = ['the', 'love', 'lovely', 'lover', 'lovf', 'night', 'nights', 'sun', 'sunny', 'walk',
+         'walking', 'adele', 'a', 'b', 'beyoncé', 'mötley', 'crüe', 'любовь', 'любимый', '夜に駆ける']
+
+QUERIES = ['the love', 'lov', 'love', 'l', 'the', 'walk sun', 'sun walk', 'a b', 'nights the',
+           'Beyonce', 'MÖTLEY crue', 'Любовь', 'люб', '夜に', 'adele lover lovely', 'zzz', '', 'the zzz']
+
+
+def make_catalog(n=60000, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    names = [' '.join(words[rng.integers(0, len(words), rng.integers(1, 4))]) for _ in range(n)]
+    artists = [' '.join(words[rng.integers(0, len(words), rng.integers(1, 3))]) for _ in range(n)]
+    # One exact 'the love' far behind thousands of prefix-only matches
+    names[-1], artists[-1] = 'The Love', 'Nobody'
+    for i in range(n - 1):
+        tokens = set(tokenize(names[i])) | set(tokenize(artists[i]))
+        if {'the', 'love'} <= tokens:
+            names[i], artists[i] = names[i].replace('love', 'lovely'), artists[i].replace('love', 'lover')
+    return names, artists
+
+
+def brute_force(row_tokens, query, limit):
+    """Every row where each query token prefixes a row token, best whole-word count first"""
+    query_tokens = set(tokenize(query))
+    if not query_tokens:
+        return []
+    scored = []
+    for row, tokens in enumerate(row_tokens):
+        if all(any(t.startswith(q) for t in tokens) for q in query_tokens):
+            scored.append((-len(query_tokens & tokens), row))
+    return [row for _, row in sorted(scored)[:limit]]
+
+
+NAMES, ARTISTS = make_catalog()
+ROW_TOKENS = [set(tokenize(track)) | set(tokenize(artist)) for track, artist in zip(NAMES, ARTISTS)]
+INDEX = SearchIndex.build(NAMES, ARTISTS)
+
+
+def test_search_matches_brute_force():
+    for query in QUERIES:
+        expected = brute_force(ROW_TOKENS, query, len(NAMES))
+        for limit in (1, 8, 100, 5000, len(NAMES)):
+            assert INDEX.search(query, limit=limit).tolist() == expected[:limit], (query, limit)
+
+
+def test_exact_match_outranks_earlier_prefix_matches():
+    assert INDEX.search('the love', limit=1).tolist() == [len(NAMES) - 1]
+    prefix_only = [r for r, tokens in enumerate(ROW_TOKENS)
+                   if 'the' in tokens and 'love' not in tokens and any(t.startswith('love') for t in tokens)]
+    assert len(prefix_only) > 1000
+    assert any('lovf' in ROW_TOKENS[r] for r in INDEX.search('lov', limit=len(NAMES)))
+
+
+def test_non_latin_names_are_searchable():
+    index = SearchIndex.build(['Любовь', '夜に駆ける', 'Beyoncé Live', 'Hello'], ['Кино', 'YOASOBI', 'x', 'y'])
+    assert index.search('любовь').tolist() == [0]
+    assert index.search('ЛЮБ').tolist() == [0]
+    assert index.search('夜に').tolist() == [1]
+    assert index.search('beyonce').tolist() == [2]
+    assert index.search('BEYONCÉ').tolist() == [2]
+
+
+def test_candidates_in_order_is_complete_for_any_chunk_size():
+    for prefix in ('l', 'lov', 'the', 'a', 'люб'):
+        lo, hi = INDEX._prefix_range(prefix)
+        expected = np.unique(INDEX.postings[INDEX.token_offsets[lo]:INDEX.token_offsets[hi]])
+        for first in (1, 3, 64, 4096, 10 ** 6):
+            chunks = list(INDEX._candidates_in_order(lo, hi, first=first))
+            got = np.concatenate(chunks) if chunks else np.empty(0, dtype=expected.dtype)
+            np.testing.assert_array_equal(got, expected, err_msg=f"{prefix!r} first={first}")
+
+
+def main():
+    print("🧪 Testing SearchIndex")
+    for test in (test_search_matches_brute_force, test_exact_match_outranks_earlier_prefix_matches,
+                 test_non_latin_names_are_searchable, test_candidates_in_order_is_complete_for_any_chunk_size):
+        test()
+        print(f"   ✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+test_user_centroids.py - Test per-user centroid learning from feedback
+Uses the trained model in model/ (run train_model.py first).
+"""
+import os
+import tempfile
+import numpy as np
+from mood_classifier import MoodClassifier
+from user_centroids import UserCentroidStore
+
+classifier = MoodClassifier()
+
+
+def _events(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    # A few heavy users plus a long tail, likes and skips mixed
+    users = np.where(rng.random(n) < 0.3, 'heavy', rng.integers(0, 200, n).astype(str)).astype(object)
+    return users, rng.random(n), rng.random(n), rng.random(n) < 0.6
+
+
+def test_batch_matches_sequential():
+    """Offsets don't depend on how the events are split into batches"""
+    users, energy, valence, liked = _events()
+    batched = UserCentroidStore(max_offset=0.3)  # small cap so clipping is exercised too
+    sequential = UserCentroidStore(max_offset=0.3)
+
+    applied = batched.record_feedback(classifier, users, energy, valence, liked)
+    for i in range(len(users)):
+        sequential.record_feedback(classifier, users[i:i + 1], energy[i:i + 1], valence[i:i + 1], liked[i:i + 1])
+
+    assert applied == len(users)
+    assert len(batched) == len(sequential)
+    centers, mapping = classifier.model.cluster_centers_, classifier.cluster_mapping
+    for user in set(users):
+        np.testing.assert_allclose(batched.personal_centers(user, centers, mapping),
+                                   sequential.personal_centers(user, centers, mapping), atol=1e-6)
+
+
+def test_repeated_likes_converge_on_track():
+    """Many likes of one track move the centroid toward it without overshooting"""
+    store = UserCentroidStore()
+    n = 40
+    store.record_feedback(classifier, ['u'] * n, [0.9] * n, [0.9] * n, [True] * n)
+
+    x = classifier.scaler.transform(np.array([[0.9, 0.9]]))[0]
+    centers = store.personal_centers('u', classifier.model.cluster_centers_, classifier.cluster_mapping)
+    cluster = int(np.linalg.norm(centers - x, axis=1).argmin())
+    before = np.linalg.norm(classifier.model.cluster_centers_[cluster] - x)
+    after = np.linalg.norm(centers[cluster] - x)
+    # Each like closes learning_rate of the remaining gap
+    np.testing.assert_allclose(after, before * (1 - store.learning_rate) ** n, rtol=1e-4)
+
+
+def test_save_load_roundtrip():
+    users, energy, valence, liked = _events(500, seed=1)
+    store = UserCentroidStore()
+    store.record_feedback(classifier, users, energy, valence, liked)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_centroids.npz')
+        store.save(path)
+        loaded = UserCentroidStore.load(path)
+
+    assert len(loaded) == len(store)
+    assert 'unknown listener' not in loaded
+    centers, mapping = classifier.model.cluster_centers_, classifier.cluster_mapping
+    for user in set(users):
+        np.testing.assert_array_equal(loaded.personal_centers(user, centers, mapping),
+                                      store.personal_centers(user, centers, mapping))
+
+
+def main():
+    print("🧪 Testing UserCentroidStore")
+    if classifier.model is None:
+        print("❌ Model not loaded. Run train_model.py first.")
+        return
+    for test in (test_batch_matches_sequential, test_repeated_likes_converge_on_track, test_save_load_roundtrip):
+        test()
+        print(f"   ✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
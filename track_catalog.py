@@ -0,0 +1,158 @@
+"""
+track_catalog.py - Compact In-Memory Track Catalog
+Holds the labeled catalog as flat numpy arrays instead of a pandas DataFrame:
+float32 features, int8 mood/cluster codes, interned artist names and
+offset-packed UTF-8 track names.
+
+Run `python track_catalog.py` to measure the footprint per million tracks.
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+CATALOG_PATH = 'dataset/spotify_with_moods.csv'
+MOODS = ['Happy', 'Energetic', 'Sad', 'Calm']
+
+
+def _pack_strings(values):
+    """Pack strings into one UTF-8 byte blob plus row offsets (uint32 while the blob fits)"""
+    encoded = [str(v).encode('utf-8') for v in values]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] < 2 ** 32:
+        offsets = offsets.astype(np.uint32)
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+class TrackCatalog:
+    """Column arrays for the labeled catalog, with the lookups app.py needs"""
+
+    # Per-track columns first, then the lookup tables they index into
+    COLUMNS = ['energy', 'valence', 'tempo', 'cluster', 'mood_codes', 'artist_codes',
+               'track_name_data', 'track_name_offsets',
+               'artist_name_data', 'artist_name_offsets',
+               'mood_order', 'mood_bounds']
+
+    def __init__(self, arrays, moods=MOODS):
+        self.arrays = arrays
+        self.moods = list(moods)
+        for key in self.COLUMNS:
+            setattr(self, key, arrays[key])
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a DataFrame with the spotify_with_moods.csv columns"""
+        mood_codes = df['mood'].map({m: i for i, m in enumerate(MOODS)}).fillna(-1).to_numpy(np.int8)
+
+        # Rows grouped by mood, so one mood is a slice instead of a scan
+        mood_order = np.argsort(mood_codes, kind='stable').astype(np.int32)
+        mood_bounds = np.searchsorted(mood_codes[mood_order], np.arange(len(MOODS) + 1)).astype(np.int64)
+
+        # Artists repeat a lot: store each name once and keep a code per track
+        artist_codes, artists = pd.factorize(df['artist_name'].astype(str), sort=False)
+        track_data, track_offsets = _pack_strings(df['track_name'])
+        artist_data, artist_offsets = _pack_strings(artists)
+
+        arrays = {
+            'energy': df['energy'].to_numpy(np.float32),
+            'valence': df['valence'].to_numpy(np.float32),
+            'tempo': df['tempo'].to_numpy(np.float32),
+            'cluster': df['cluster'].to_numpy(np.int8),
+            'mood_codes': mood_codes,
+            'artist_codes': artist_codes.astype(np.int32),
+            'track_name_data': track_data,
+            'track_name_offsets': track_offsets,
+            'artist_name_data': artist_data,
+            'artist_name_offsets': artist_offsets,
+            'mood_order': mood_order,
+            'mood_bounds': mood_bounds,
+        }
+        return cls(arrays)
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        return cls.from_frame(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.mood_codes)
+
+    @property
+    def nbytes(self):
+        """Total bytes held by the catalog arrays"""
+        return sum(arr.nbytes for arr in self.arrays.values())
+
+    def memory_report(self):
+        """Bytes per column, largest first"""
+        return dict(sorted(((k, a.nbytes) for k, a in self.arrays.items()),
+                           key=lambda kv: kv[1], reverse=True))
+
+    def track_name(self, i):
+        start, end = self.track_name_offsets[i], self.track_name_offsets[i + 1]
+        return bytes(self.track_name_data[start:end]).decode('utf-8')
+
+    def artist_name(self, i):
+        code = self.artist_codes[i]
+        start, end = self.artist_name_offsets[code], self.artist_name_offsets[code + 1]
+        return bytes(self.artist_name_data[start:end]).decode('utf-8')
+
+    def mood_rows(self, mood):
+        """Row indices of all tracks labeled with the given mood"""
+        code = self.moods.index(mood)
+        return self.mood_order[self.mood_bounds[code]:self.mood_bounds[code + 1]]
+
+    def row(self, i):
+        """Display fields for one track, in the same shape as a catalog CSV row"""
+        code = int(self.mood_codes[i])
+        return {
+            'track_name': self.track_name(i),
+            'artist_name': self.artist_name(i),
+            'energy': round(float(self.energy[i]), 6),
+            'valence': round(float(self.valence[i]), 6),
+            'tempo': round(float(self.tempo[i]), 3),
+            'cluster': int(self.cluster[i]),
+            'mood': self.moods[code] if code >= 0 else 'Unknown',
+        }
+
+    def to_frame(self, rows):
+        """Materialize a handful of rows (e.g. a playlist) as a DataFrame"""
+        return pd.DataFrame([self.row(int(i)) for i in rows])
+
+
+def _synthetic_frame(n, num_artists=100_000, seed=0):
+    """Catalog-shaped DataFrame with realistic string lengths, for measurement"""
+    rng = np.random.default_rng(seed)
+    artists = np.array([f"Artist {i:06d}" for i in range(num_artists)], dtype=object)
+    return pd.DataFrame({
+        'track_name': [f"Track Title Number {i}" for i in range(n)],
+        'artist_name': artists[rng.integers(0, num_artists, n)],
+        'energy': rng.random(n),
+        'valence': rng.random(n),
+        'tempo': rng.uniform(60, 200, n),
+        'cluster': rng.integers(0, 4, n),
+        'mood': np.array(MOODS, dtype=object)[rng.integers(0, 4, n)],
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"📏 Measuring catalog footprint for {n:,} synthetic tracks...")
+    df = _synthetic_frame(n)
+    df_bytes = df.memory_usage(deep=True).sum()
+
+    t0 = time.perf_counter()
+    catalog = TrackCatalog.from_frame(df)
+    build_s = time.perf_counter() - t0
+
+    print(f"   DataFrame:    {df_bytes / 2**20:8.1f} MiB ({df_bytes / n:6.1f} B/track)")
+    print(f"   TrackCatalog: {catalog.nbytes / 2**20:8.1f} MiB ({catalog.nbytes / n:6.1f} B/track)")
+    print(f"   Built in {build_s:.2f}s")
+    print("\n   Per column:")
+    for key, size in catalog.memory_report().items():
+        print(f"   {key:<22} {size / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,31 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
+from profiler import StageProfiler
+from training_cache import TrainingCache, cache_key
+from search_index import INDEX_PATH, SearchIndex
+from drift_monitor import BASELINE_PATH, FeatureSketch, save_baseline
 
 # Create model directory
 if not os.path.exists('model'):
     os.makedirs('model')
 
-def train_model():
+# Everything besides the input data that determines the training outputs
+TRAINING_CONFIG = {
+    'features': ['energy', 'valence'],
+    'n_clusters': 4,
+    'random_state': 42,
+    'n_init': 10,
+}
+
+def train_model(profiler=None, use_cache=True):
+    """
+    Train and save the model artifacts.
+    Pass an enabled StageProfiler to record time and memory per stage.
+    With use_cache, an input/config pair seen before restores its cached
+    artifacts instead of refitting.
+    """
+    profiler = profiler or StageProfiler(enabled=False)
     print("🚀 Starting AI Model Training...")
     
     # 1. Load Data
@@ -23,23 +42,113 @@ def train_model():
     if not os.path.exists(input_path):
         print(f"❌ Error: {input_path} not found!")
         return False
-        
-    df = pd.read_csv(input_path)
+    
+    profiler.start()
+    try:
+        return _run_training(input_path, profiler, use_cache)
+    except BaseException:
+        profiler.meta['status'] = 'failed'
+        raise
+    finally:
+        # Always stop tracing and keep the partial trace, even if a stage raised
+        profiler.finish()
+        profiler.print_summary()
+
+def _run_training(input_path, profiler, use_cache):
+    """The training stages of train_model(); the caller owns the profiler's lifetime"""
+    cache = TrainingCache()
+    if use_cache:
+        with profiler.stage('cache_lookup'):
+            key = cache_key(input_path, TRAINING_CONFIG)
+            hit = cache.restore(key)
+        if hit:
+            print(f"♻️  Input and config unchanged - reused cached model {key[:12]}")
+            profiler.meta['cache'] = 'hit'
+            return True
+        profiler.meta['cache'] = 'miss'
+    
+    with profiler.stage('csv_load'):
+        df = pd.read_csv(input_path)
     print(f"📊 Loaded {len(df)} songs from dataset")
+    profiler.meta['num_songs'] = len(df)
     
     # 2. Feature Selection & Preprocessing
-    features = ['energy', 'valence']
+    features = TRAINING_CONFIG['features']
     X = df[features]
     
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    with profiler.stage('scaling'):
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
     
     # 3. Train K-means Model
     print("🧠 Training K-means clustering model...")
-    kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-    clusters = kmeans.fit_predict(X_scaled)
+    with profiler.stage('kmeans_fit'):
+        kmeans = KMeans(n_clusters=TRAINING_CONFIG['n_clusters'],
+                        random_state=TRAINING_CONFIG['random_state'],
+                        n_init=TRAINING_CONFIG['n_init'])
+        clusters = kmeans.fit_predict(X_scaled)
     
     # 4. Map Clusters to Mood Labels
+    with profiler.stage('mapping'):
+        cluster_mapping, centroids_orig = map_clusters_to_moods(kmeans, scaler)
+
+    print("✅ Cluster Mapping Established:")
+    for c, m in cluster_mapping.items():
+        print(f"   Cluster {c} -> {m} (Centroid: E={centroids_orig[c][0]:.2f}, V={centroids_orig[c][1]:.2f})")
+        
+    # Apply mapping
+    df['cluster'] = clusters
+    df['mood'] = df['cluster'].map(cluster_mapping)
+    
+    # 5. Save Artifacts
+    print("💾 Saving model artifacts...")
+    with profiler.stage('artifact_dump'):
+        joblib.dump(kmeans, 'model/kmeans_model.pkl')
+        joblib.dump(scaler, 'model/scaler.pkl')
+        joblib.dump(cluster_mapping, 'model/cluster_mapping.pkl')
+    
+    # Reference distribution for the drift monitor on the prediction path
+    with profiler.stage('drift_baseline'):
+        dist_to_center = kmeans.transform(X_scaled)[np.arange(len(clusters)), clusters]
+        save_baseline(FeatureSketch.from_training(df['energy'].to_numpy(), df['valence'].to_numpy(),
+                                                  clusters, dist_to_center), BASELINE_PATH)
+    
+    with profiler.stage('csv_write'):
+        df.to_csv('dataset/spotify_with_moods.csv', index=False)
+    
+    # Type-ahead index over track/artist names; row ids match the labeled CSV
+    print("🔎 Building search index...")
+    with profiler.stage('search_index'):
+        SearchIndex.build(df['track_name'], df['artist_name'],
+                          source_mtime=os.path.getmtime('dataset/spotify_with_moods.csv')).save(INDEX_PATH)
+    
+    # 6. Generate Visualization
+    print("🎨 Generating visualization...")
+    with profiler.stage('plotting'):
+        plot_clusters(df, centroids_orig, cluster_mapping)
+    
+    if use_cache:
+        with profiler.stage('cache_store'):
+            cache.store(key, TRAINING_CONFIG)
+    
+    print("\n" + "="*50)
+    print("🎉 TRAINING COMPLETE!")
+    print("="*50)
+    print(f"Files saved:")
+    print("- model/kmeans_model.pkl")
+    print("- model/scaler.pkl")
+    print("- model/cluster_mapping.pkl")
+    print(f"- {BASELINE_PATH}")
+    print("- model/cluster_visualization.png")
+    print(f"- {INDEX_PATH}")
+    print("- dataset/spotify_with_moods.csv")
+    return True
+
+def map_clusters_to_moods(kmeans, scaler):
+    """
+    Map each cluster to a mood label.
+    Returns: cluster_mapping (dict), centroids_orig (centroids in original energy/valence scale)
+    """
     # We map based on the centroid position relative to the 4 quadrants of valence/energy
     centroids = kmeans.cluster_centers_
     # Inverse transform to get back to original scale (0-1 approx)
@@ -91,24 +200,10 @@ def train_model():
     for c, m in zip(remaining_clusters, remaining_moods):
         cluster_mapping[c] = m
 
-    print("✅ Cluster Mapping Established:")
-    for c, m in cluster_mapping.items():
-        print(f"   Cluster {c} -> {m} (Centroid: E={centroids_orig[c][0]:.2f}, V={centroids_orig[c][1]:.2f})")
-        
-    # Apply mapping
-    df['cluster'] = clusters
-    df['mood'] = df['cluster'].map(cluster_mapping)
-    
-    # 5. Save Artifacts
-    print("💾 Saving model artifacts...")
-    joblib.dump(kmeans, 'model/kmeans_model.pkl')
-    joblib.dump(scaler, 'model/scaler.pkl')
-    joblib.dump(cluster_mapping, 'model/cluster_mapping.pkl')
-    
-    df.to_csv('dataset/spotify_with_moods.csv', index=False)
-    
-    # 6. Generate Visualization
-    print("🎨 Generating visualization...")
+    return cluster_mapping, centroids_orig
+
+def plot_clusters(df, centroids_orig, cluster_mapping):
+    """Save the mood cluster scatter plot"""
     plt.figure(figsize=(10, 8))
     
     # Define colors for moods
@@ -132,18 +227,6 @@ def train_model():
     
     plt.savefig('model/cluster_visualization.png', dpi=300, bbox_inches='tight')
     plt.close()
-    
-    print("\n" + "="*50)
-    print("🎉 TRAINING COMPLETE!")
-    print("="*50)
-    print(f"Files saved:")
-    print("- model/kmeans_model.pkl")
-    print("- model/scaler.pkl")
-    print("- model/cluster_mapping.pkl")
-    print("- model/cluster_visualization.png")
-    print("- dataset/spotify_with_moods.csv")
-    
-    return True
 
 if __name__ == "__main__":
     train_model()
\ No newline at end of file
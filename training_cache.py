@@ -0,0 +1,136 @@
+"""
+training_cache.py - Content-Addressed Training Cache
+Keys training outputs by a hash of the input CSV and the training config,
+so an unchanged input reuses the saved artifacts instead of refitting.
+
+Layout: model/cache/<key>/ holds a copy of every artifact plus manifest.json.
+The manifest is written last, so an entry without one is incomplete and ignored.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+CACHE_DIR = 'model/cache'
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Bump when train_model() changes in a way that alters its outputs for the same input
+CACHE_VERSION = 3
+
+# Files produced by train_model(): cache file name -> path in the working tree
+ARTIFACTS = {
+    'kmeans_model.pkl': 'model/kmeans_model.pkl',
+    'scaler.pkl': 'model/scaler.pkl',
+    'cluster_mapping.pkl': 'model/cluster_mapping.pkl',
+    'drift_baseline.pkl': 'model/drift_baseline.pkl',
+    'cluster_visualization.png': 'model/cluster_visualization.png',
+    'search_index.pkl': 'model/search_index.pkl',
+    'spotify_with_moods.csv': 'dataset/spotify_with_moods.csv',
+}
+
+# Unfinished entries (<key>.tmp-<pid>) older than this belong to a run that died
+STALE_TMP_SECONDS = 3600
+
+_MANIFEST = 'manifest.json'
+
+
+def cache_key(input_path, config):
+    """sha256 over the input file bytes, the training config and CACHE_VERSION"""
+    h = hashlib.sha256()
+    h.update(json.dumps({'version': CACHE_VERSION, 'config': config}, sort_keys=True).encode('utf-8'))
+    with open(input_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TrainingCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def has(self, key):
+        entry = self._entry_dir(key)
+        return os.path.exists(os.path.join(entry, _MANIFEST)) and all(
+            os.path.exists(os.path.join(entry, name)) for name in ARTIFACTS)
+
+    def restore(self, key):
+        """Copy a cached entry's artifacts back into place. Returns False on a miss."""
+        if not self.has(key):
+            return False
+        entry = self._entry_dir(key)
+        for name, dest in ARTIFACTS.items():
+            os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+            shutil.copy2(os.path.join(entry, name), dest)
+        # Manifest mtime doubles as last-used time for eviction
+        os.utime(os.path.join(entry, _MANIFEST))
+        return True
+
+    def store(self, key, config):
+        """Copy the freshly trained artifacts into a new entry, then evict old entries"""
+        entry = self._entry_dir(key)
+        tmp = f"{entry}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        try:
+            for name, src in ARTIFACTS.items():
+                shutil.copy2(src, os.path.join(tmp, name))
+            with open(os.path.join(tmp, _MANIFEST), 'w') as f:
+                json.dump({'key': key, 'config': config, 'version': CACHE_VERSION,
+                           'created_at': time.time()}, f, indent=2)
+
+            # Publish the entry in one rename so readers never see a half-written one
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def entries(self):
+        """Complete entries as (key, last_used, size_bytes), least recently used first"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        found = []
+        for key in os.listdir(self.cache_dir):
+            entry = self._entry_dir(key)
+            manifest = os.path.join(entry, _MANIFEST)
+            if not os.path.exists(manifest):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            found.append((key, os.path.getmtime(manifest), size))
+        return sorted(found, key=lambda e: e[1])
+
+    def remove_stale_tmp(self, max_age=STALE_TMP_SECONDS):
+        """Delete unfinished entries left behind by runs that were killed mid-store"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        removed = []
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if '.tmp-' in name and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def evict(self, keep=None):
+        """Delete stale unfinished entries, then least recently used entries until the cache fits in max_bytes"""
+        self.remove_stale_tmp()
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        evicted = []
+        for key, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
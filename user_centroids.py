@@ -0,0 +1,212 @@
+"""
+user_centroids.py - Personalized Mood Centroids
+Learns a small per-user offset for each mood centroid from like/skip feedback,
+so "Calm" can mean something slightly different for every listener.
+
+Offsets live in the scaler's feature space and are keyed by mood (not cluster id),
+so they survive a retrain. Users are looked up by a 64-bit hash of their id in a
+sorted array, so each user costs 32 bytes of offsets + 16 bytes of index
+(about 48 MB per million users) rather than a Python dict entry and string.
+
+Usage:
+    python user_centroids.py feedback.csv   # columns: user, action (like/skip), track or energy+valence
+"""
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+from mood_classifier import MoodClassifier
+from track_catalog import TrackCatalog, MOODS
+
+STORE_PATH = 'model/user_centroids.npz'
+
+
+class UserCentroidStore:
+    def __init__(self, capacity=1024, learning_rate=0.05, skip_rate=0.02, max_offset=1.0):
+        """
+        learning_rate: how far a like pulls the mood centroid toward the track
+        skip_rate: how far a skip pushes it away
+        max_offset: cap on an offset's length, in standard deviations
+        """
+        self.learning_rate = learning_rate
+        self.skip_rate = skip_rate
+        self.max_offset = max_offset
+        self.user_keys = np.empty(0, dtype=np.uint64)  # sorted hashes of user ids
+        self.key_rows = np.empty(0, dtype=np.int64)    # offsets row of each key
+        self.offsets = np.zeros((capacity, len(MOODS), 2), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.user_keys)
+
+    def __contains__(self, user_id):
+        return self._row(user_id) is not None
+
+    def _lookup(self, keys):
+        """Rows for hashed ids (-1 where unknown)"""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if len(self.user_keys):
+            pos = np.minimum(np.searchsorted(self.user_keys, keys), len(self.user_keys) - 1)
+            found = self.user_keys[pos] == keys
+            rows[found] = self.key_rows[pos[found]]
+        return rows
+
+    def _row(self, user_id):
+        row = int(self._lookup(_hash_ids([user_id]))[0])
+        return None if row < 0 else row
+
+    def _rows(self, user_ids):
+        """Row per user id, adding unseen users"""
+        keys = _hash_ids(user_ids)
+        rows = self._lookup(keys)
+        new_keys = np.unique(keys[rows < 0])
+        if len(new_keys):
+            start = len(self.user_keys)
+            needed = start + len(new_keys)
+            if needed > len(self.offsets):
+                grown = np.zeros((max(needed, 2 * len(self.offsets)), len(MOODS), 2), dtype=np.float32)
+                grown[:len(self.offsets)] = self.offsets
+                self.offsets = grown
+            keys_all = np.concatenate([self.user_keys, new_keys])
+            rows_all = np.concatenate([self.key_rows, np.arange(start, needed, dtype=np.int64)])
+            order = np.argsort(keys_all, kind='stable')
+            self.user_keys, self.key_rows = keys_all[order], rows_all[order]
+            rows = self._lookup(keys)
+        return rows
+
+    def personal_centers(self, user_id, cluster_centers, cluster_mapping):
+        """Cluster centers shifted by this user's offsets, or None for an unknown user"""
+        row = self._row(user_id)
+        if row is None:
+            return None
+        mood_idx = _cluster_mood_index(cluster_mapping, len(cluster_centers))
+        shift = np.where((mood_idx >= 0)[:, None], self.offsets[row, mood_idx], 0.0)
+        return cluster_centers + shift
+
+    def record_feedback(self, classifier, user_ids, energy, valence, liked):
+        """
+        Apply a batch of feedback events. Each event updates the centroid of the mood
+        the track falls into for that user: a like pulls it toward the track, a skip
+        pushes it away.
+        Events are applied in order, so a batch gives the same offsets as feeding the
+        same events one at a time.
+        """
+        if classifier.model is None:
+            raise ValueError("feedback needs a trained model")
+        liked = np.asarray(liked, dtype=bool)
+        if len(liked) == 0:
+            return 0
+        rows = self._rows(list(user_ids))
+        x = classifier.scaler.transform(np.column_stack([
+            np.asarray(energy, dtype=np.float64), np.asarray(valence, dtype=np.float64)]))
+
+        base = classifier.model.cluster_centers_
+        mood_idx = _cluster_mood_index(classifier.cluster_mapping, len(base))
+
+        # Only a user's own earlier events affect their next one, so apply the batch in
+        # rounds: round k holds every user's k-th event and has no repeated users.
+        occurrence = pd.Series(rows).groupby(rows).cumcount().to_numpy()
+        order = np.argsort(occurrence, kind='stable')
+        bounds = np.r_[0, np.flatnonzero(np.diff(occurrence[order])) + 1, len(order)]
+        applied = 0
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            events = order[lo:hi]
+            applied += self._apply_round(base, mood_idx, rows[events], x[events], liked[events])
+        return applied
+
+    def _apply_round(self, base, mood_idx, rows, x, liked):
+        """Update offsets for events of distinct users"""
+        valid = mood_idx >= 0
+        offsets = np.where(valid[None, :, None], self.offsets[rows][:, np.where(valid, mood_idx, 0)], 0.0)
+        centers = base[None, :, :] + offsets                            # (events, clusters, 2)
+        clusters = np.linalg.norm(centers - x[:, None, :], axis=2).argmin(axis=1)
+        moods = mood_idx[clusters]
+
+        ok = moods >= 0
+        rows, moods, x, liked, clusters = rows[ok], moods[ok], x[ok], liked[ok], clusters[ok]
+        current = base[clusters] + self.offsets[rows, moods]
+        rate = np.where(liked, self.learning_rate, -self.skip_rate)[:, None]
+        updated = self.offsets[rows, moods] + (rate * (x - current)).astype(np.float32)
+
+        # Keep offsets bounded so a run of skips can't push a centroid off the map
+        norms = np.linalg.norm(updated, axis=1, keepdims=True)
+        scale = np.minimum(1.0, self.max_offset / np.maximum(norms, 1e-12))
+        self.offsets[rows, moods] = updated * scale
+        return int(ok.sum())
+
+    def save(self, path=STORE_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, user_keys=self.user_keys, key_rows=self.key_rows, offsets=self.offsets[:len(self)],
+                 moods=np.array(MOODS),
+                 params=np.array([self.learning_rate, self.skip_rate, self.max_offset]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        with np.load(path) as data:
+            if list(data['moods']) != MOODS:
+                raise ValueError(f"{path} was saved with moods {list(data['moods'])}")
+            learning_rate, skip_rate, max_offset = data['params'].tolist()
+            offsets = data['offsets']
+            store = cls(capacity=max(len(offsets), 1), learning_rate=learning_rate,
+                        skip_rate=skip_rate, max_offset=max_offset)
+            store.offsets[:len(offsets)] = offsets
+            store.user_keys, store.key_rows = data['user_keys'], data['key_rows']
+        return store
+
+
+def _hash_ids(user_ids):
+    """Stable 64-bit hash of each user id (compared as strings)"""
+    return pd.util.hash_array(np.asarray([str(u) for u in user_ids], dtype=object), categorize=False)
+
+
+def _cluster_mood_index(cluster_mapping, num_clusters):
+    """Index into MOODS for each cluster (-1 if its mood is unknown)"""
+    return np.array([MOODS.index(cluster_mapping[c]) if cluster_mapping.get(c) in MOODS else -1
+                     for c in range(num_clusters)], dtype=np.int64)
+
+
+def load_user_centroids(path=STORE_PATH):
+    """The saved store, or None if none has been trained yet"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return UserCentroidStore.load(path)
+    except Exception as e:
+        print(f"⚠️ Could not load user centroids: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn per-user mood centroids from like/skip feedback")
+    parser.add_argument('feedback', help="feedback events (.csv or .jsonl) with user and action columns")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--catalog', default='dataset/spotify_with_moods.csv')
+    args = parser.parse_args()
+
+    # Reuse the event reader and catalog lookup from the listening-stream pipeline
+    from mood_stream import MoodTagger, iter_event_batches
+
+    classifier = MoodClassifier()
+    if classifier.model is None:
+        sys.exit(1)
+    catalog = TrackCatalog.load(args.catalog) if os.path.exists(args.catalog) else None
+    tagger = MoodTagger(classifier, catalog)
+    store = load_user_centroids(args.store) or UserCentroidStore()
+
+    applied = 0
+    for batch in iter_event_batches(args.feedback, extra_columns=['action']):
+        tagger.tag(batch)  # fills energy/valence for catalog tracks
+        action = batch['action'].astype(str)
+        known = ~np.isnan(batch['energy']) & ~np.isnan(batch['valence']) & np.isin(action, ['like', 'skip'])
+        if known.any():
+            applied += store.record_feedback(classifier, batch['user'][known], batch['energy'][known],
+                                             batch['valence'][known], action[known] == 'like')
+
+    store.save(args.store)
+    print(f"✅ Applied {applied:,} feedback events; {len(store):,} users saved to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,11 @@ def verify():
     else:
          print(f"   ⚠️ Unexpected mood: {mood}")
 
+    if classifier.drift_monitor is not None:
+        print("\n📈 Drift monitor active (baseline: model/drift_baseline.pkl)")
+    else:
+        print("\n⚠️ No drift baseline found - retrain to enable drift monitoring")
+
     print("\n✨ Verification Complete!")
     return True
 